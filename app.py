@@ -1,139 +1,1725 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import requests
-from collections import Counter, defaultdict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from array import array
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import compress, islice
+from operator import attrgetter
+import bisect
+import heapq
+import itertools
+import threading
 import time
 import logging
+import codecs
 import datetime
+import hashlib
+import json
 import os
+import random
+import re
+import sqlite3
+import sys
+import zlib
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
 
 app = Flask(__name__)
 CORS(app)
 
-CF_API_BASE = "https://codeforces.com/api"
+# Point at mock_cf_server.py (or any compatible stand-in) for load testing
+CF_API_BASE = os.environ.get("CF_API_BASE", "https://codeforces.com/api")
 
 # Setup simple logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Simple in-memory cache with expiry (60 seconds)
-cache = {}
+# Shared HTTP client settings (overridable via environment)
+HTTP_POOL_SIZE = int(os.environ.get("CF_HTTP_POOL_SIZE", 16))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("CF_HTTP_CONNECT_TIMEOUT", 3.05))
+HTTP_READ_TIMEOUT = float(os.environ.get("CF_HTTP_READ_TIMEOUT", 10))
+HTTP_RETRIES = int(os.environ.get("CF_HTTP_RETRIES", 2))
+HTTP_RETRY_BACKOFF = float(os.environ.get("CF_HTTP_RETRY_BACKOFF", 0.5))
+HTTP_RETRY_STATUSES = (500, 502, 504)
 
-def cached_fetch(url, expiry=60):
-    now = time.time()
-    if url in cache:
-        data, timestamp = cache[url]
-        if now - timestamp < expiry:
-            logging.info(f"Cache hit for URL: {url}")
-            return data, None
-        else:
-            logging.info(f"Cache expired for URL: {url}")
-    # Fetch fresh
+# Worker threads for upstream calls that miss the cache. Shared by all
+# requests, and workers may wait on the rate limiter, so keep it roomy.
+FETCH_WORKERS = int(os.environ.get("CF_FETCH_WORKERS", 32))
+fetch_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="cf-fetch")
+
+# Process-wide counters, exposed through /api/metrics
+metrics = Counter()
+metrics_lock = threading.Lock()
+
+def incr(name, amount=1):
+    with metrics_lock:
+        metrics[name] += amount
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session():
+    # One keep-alive session for all Codeforces calls; urllib3's pool manager
+    # is thread-safe, so worker threads share the same sized connection pool.
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                # Only failed connects are retried here, as nothing reached
+                # Codeforces. Error statuses are retried by http_fetch through
+                # the rate limiter, and read timeouts are not retried at all.
+                retry = Retry(
+                    total=HTTP_RETRIES,
+                    read=0,
+                    backoff_factor=HTTP_RETRY_BACKOFF,
+                    status_forcelist=(),
+                    allowed_methods=frozenset(["GET"]),
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _http_session = session
+    return _http_session
+
+def http_pool_stats():
+    pools = []
+    if _http_session is not None:
+        manager = _http_session.get_adapter(CF_API_BASE).poolmanager
+        for key in manager.pools.keys():
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            pools.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "connections_created": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle_connections": sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0,
+                "max_size": HTTP_POOL_SIZE,
+            })
+    return {
+        "pool_size": HTTP_POOL_SIZE,
+        "connect_timeout": HTTP_CONNECT_TIMEOUT,
+        "read_timeout": HTTP_READ_TIMEOUT,
+        "retries": HTTP_RETRIES,
+        "pools": pools,
+    }
+
+# Outbound call scheduling. Interactive /api/stats traffic is served ahead of
+# background refreshes; each class has its own bound on how long it may queue.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BACKGROUND: "background"}
+
+RATE_LIMIT = float(os.environ.get("CF_RATE_LIMIT", 0.5))  # calls per second, 0 disables
+RATE_LIMIT_BURST = float(os.environ.get("CF_RATE_LIMIT_BURST", 4))
+RATE_LIMIT_MAX_WAIT = {
+    PRIORITY_INTERACTIVE: float(os.environ.get("CF_RATE_LIMIT_MAX_WAIT", 10)),
+    PRIORITY_BACKGROUND: float(os.environ.get("CF_RATE_LIMIT_MAX_WAIT_BACKGROUND", 60)),
+}
+
+fetch_context = threading.local()
+
+def current_priority():
+    return getattr(fetch_context, "priority", PRIORITY_INTERACTIVE)
+
+# Token bucket shared by all outbound calls. Waiters are granted tokens strictly
+# in (priority, arrival) order and give up once their class's max wait passes.
+class RateLimiter:
+    def __init__(self, rate, burst, max_wait):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.cond = threading.Condition()
+        self.waiters = []
+        self.sequence = itertools.count()
+        self.granted = Counter()
+        self.timeouts = Counter()
+        self.wait_seconds = Counter()
+        self.max_queue_depth = 0
+        self.penalties = 0
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority):
+        if self.rate <= 0:
+            return True
+        start = time.monotonic()
+        deadline = start + self.max_wait[priority]
+        ticket = (priority, next(self.sequence))
+        with self.cond:
+            heapq.heappush(self.waiters, ticket)
+            self.max_queue_depth = max(self.max_queue_depth, len(self.waiters))
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self.waiters[0] == ticket and self.tokens >= 1:
+                    heapq.heappop(self.waiters)
+                    self.tokens -= 1
+                    self.granted[priority] += 1
+                    self.wait_seconds[priority] += now - start
+                    self.cond.notify_all()
+                    return True
+                if now >= deadline:
+                    self.waiters.remove(ticket)
+                    heapq.heapify(self.waiters)
+                    self.timeouts[priority] += 1
+                    self.cond.notify_all()
+                    return False
+                timeout = deadline - now
+                if self.waiters[0] == ticket:
+                    timeout = min(timeout, (1 - self.tokens) / self.rate)
+                self.cond.wait(timeout)
+
+    def penalize(self):
+        # Upstream says we are over its limit: drop all banked tokens
+        with self.cond:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0)
+            self.penalties += 1
+
+    def stats(self):
+        with self.cond:
+            depth = Counter(priority for priority, _ in self.waiters)
+            classes = {}
+            for priority, name in PRIORITY_NAMES.items():
+                granted = self.granted[priority]
+                classes[name] = {
+                    "queued": depth[priority],
+                    "granted": granted,
+                    "timeouts": self.timeouts[priority],
+                    "avg_wait": round(self.wait_seconds[priority] / granted, 4) if granted else 0.0,
+                    "max_wait": self.max_wait[priority],
+                }
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "tokens": round(self.tokens, 3),
+                "queue_depth": len(self.waiters),
+                "max_queue_depth": self.max_queue_depth,
+                "penalties": self.penalties,
+                "classes": classes,
+            }
+
+rate_limiter = RateLimiter(RATE_LIMIT, RATE_LIMIT_BURST, RATE_LIMIT_MAX_WAIT)
+
+# Typed records for the large results. Only the fields the dashboard reads are
+# kept, as __slots__ attributes; repeated strings (verdicts, languages, tags,
+# countries) are interned so equal values share one object.
+def intern_value(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+class Record:
+    __slots__ = ()
+
+    def as_list(self):
+        return [getattr(self, field) for field in self.__slots__]
+
+    @classmethod
+    def from_list(cls, values):
+        return cls(*values)
+
+    def __repr__(self):
+        fields = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+class Submission(Record):
+    __slots__ = ("id", "contest_id", "creation_time", "language", "verdict", "problem_contest_id", "problem_index", "rating", "tags")
+
+    def __init__(self, id, contest_id, creation_time, language, verdict, problem_contest_id, problem_index, rating, tags):
+        self.id = id
+        self.contest_id = contest_id
+        self.creation_time = creation_time
+        self.language = intern_value(language)
+        self.verdict = intern_value(verdict)  # None while the submission is queued
+        self.problem_contest_id = problem_contest_id
+        self.problem_index = intern_value(problem_index)
+        self.rating = rating
+        self.tags = tuple(map(sys.intern, tags))
+
+    @classmethod
+    def from_api(cls, sub):
+        problem = sub.get('problem', {})
+        return cls(
+            sub['id'], sub.get('contestId'), sub.get('creationTimeSeconds'), sub.get('programmingLanguage'),
+            sub.get('verdict'), problem.get('contestId'), problem.get('index'), problem.get('rating'),
+            problem.get('tags', ()),
+        )
+
+class RatingChange(Record):
+    __slots__ = ("contest_id", "contest_name", "rank", "old_rating", "new_rating", "update_time")
+
+    def __init__(self, contest_id, contest_name, rank, old_rating, new_rating, update_time):
+        self.contest_id = contest_id
+        self.contest_name = contest_name
+        self.rank = rank
+        self.old_rating = old_rating
+        self.new_rating = new_rating
+        self.update_time = update_time
+
+    @classmethod
+    def from_api(cls, change):
+        return cls(
+            change.get('contestId'), change.get('contestName'), change.get('rank'), change.get('oldRating'),
+            change.get('newRating'), change.get('ratingUpdateTimeSeconds'),
+        )
+
+class RatedUser(Record):
+    __slots__ = ("handle", "country", "rating")
+
+    def __init__(self, handle, country, rating):
+        self.handle = handle
+        self.country = intern_value(country)
+        self.rating = rating
+
+    @classmethod
+    def from_api(cls, user):
+        return cls(user['handle'], user.get('country'), user.get('rating'))
+
+class Contest(Record):
+    __slots__ = ("id", "name", "type", "phase", "start_time", "duration")
+
+    def __init__(self, id, name, type, phase, start_time, duration):
+        self.id = id
+        self.name = name
+        self.type = intern_value(type)
+        self.phase = intern_value(phase)
+        self.start_time = start_time
+        self.duration = duration
+
+    @classmethod
+    def from_api(cls, contest):
+        return cls(
+            contest['id'], contest.get('name'), contest.get('type'), contest.get('phase'),
+            contest.get('startTimeSeconds'), contest.get('durationSeconds'),
+        )
+
+RECORD_TYPES = {cls.__name__: cls for cls in (Submission, RatingChange, RatedUser, Contest)}
+
+# Large results are decoded incrementally from the response stream straight
+# into records, instead of buffering the raw body, its text and the full
+# object tree at once.
+STREAM_CHUNK_SIZE = 64 * 1024
+RESULT_ARRAY_RE = re.compile(r'"result"\s*:\s*\[')
+STATUS_OK_RE = re.compile(r'"status"\s*:\s*"OK"')
+
+STREAMED_RESULTS = {
+    "user.status": Submission.from_api,
+    "user.rating": RatingChange.from_api,
+    "user.ratedList": RatedUser.from_api,
+    "contest.list": Contest.from_api,
+}
+
+def parse_envelope(data):
+    if data['status'] != 'OK':
+        return None, data.get('comment', 'API error')
+    return data['result'], None
+
+def stream_api_result(chunks, project):
+    # `chunks` yields the raw body bytes; returns (projected result items, error)
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buf = ""
+    match = None
+    for chunk in chunks:
+        buf += text_decoder.decode(chunk)
+        match = RESULT_ARRAY_RE.search(buf)
+        if match:
+            break
+    if match is None or not STATUS_OK_RE.search(buf, 0, match.start()):
+        # Error envelopes are small (or unexpectedly shaped): decode them whole
+        buf += "".join(text_decoder.decode(chunk) for chunk in chunks)
+        buf += text_decoder.decode(b"", final=True)
+        data, err = parse_envelope(json.loads(buf))
+        return ([project(item) for item in data] if err is None else None), err
+
+    items = []
+    pos = match.end()
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buf):
+            if buf[pos] == "]":
+                return items, None
+            try:
+                item, pos = decoder.raw_decode(buf, pos)
+                items.append(project(item))
+                continue
+            except json.JSONDecodeError:
+                pass  # the item continues in the next chunk
+        chunk = next(chunks, None)
+        if chunk is None:
+            raise ValueError("Truncated Codeforces API response")
+        buf = buf[pos:] + text_decoder.decode(chunk)
+        pos = 0
+
+# Per-method circuit breakers. After BREAKER_FAILURES consecutive failures a
+# method's calls fail fast for a jittered, exponentially growing cooldown; then
+# a single half-open probe decides whether to close the circuit again.
+BREAKER_FAILURES = int(os.environ.get("CF_BREAKER_FAILURES", 5))
+BREAKER_COOLDOWN = float(os.environ.get("CF_BREAKER_COOLDOWN", 5))
+BREAKER_MAX_COOLDOWN = float(os.environ.get("CF_BREAKER_MAX_COOLDOWN", 120))
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold, cooldown, max_cooldown):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.probing = False
+        self.total_failures = 0
+        self.total_rejected = 0
+        self.total_opens = 0
+
+    def allow(self):
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() < self.open_until:
+                    self.total_rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self.probing = False
+            if self.probing:
+                self.total_rejected += 1
+                return False
+            self.probing = True
+            return True
+
+    def release(self):
+        # The permitted call never reached the network, or was only throttled
+        with self.lock:
+            self.probing = False
+
+    def is_open(self):
+        with self.lock:
+            return self.state != self.CLOSED
+
+    def record_success(self):
+        with self.lock:
+            if self.state != self.CLOSED:
+                logging.info(f"Circuit for {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trips = 0
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.total_failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                cooldown = min(self.max_cooldown, self.cooldown * 2 ** self.trips)
+                cooldown = random.uniform(cooldown / 2, cooldown)
+                self.trips += 1
+                self.total_opens += 1
+                self.state = self.OPEN
+                self.open_until = time.monotonic() + cooldown
+                self.probing = False
+                logging.warning(f"Circuit for {self.name} opened for {cooldown:.1f}s")
+
+    def stats(self):
+        with self.lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "open_for": round(max(0.0, self.open_until - time.monotonic()), 2) if self.state == self.OPEN else 0.0,
+                "trips": self.trips,
+                "total_failures": self.total_failures,
+                "total_rejected": self.total_rejected,
+                "total_opens": self.total_opens,
+            }
+
+breakers = {}
+breakers_lock = threading.Lock()
+
+def get_breaker(method):
+    with breakers_lock:
+        breaker = breakers.get(method)
+        if breaker is None:
+            breaker = breakers[method] = CircuitBreaker(method, BREAKER_FAILURES, BREAKER_COOLDOWN, BREAKER_MAX_COOLDOWN)
+        return breaker
+
+# Record/replay of upstream responses for offline benchmarks and regression runs.
+# CF_FIXTURE_MODE=record saves every response (status, body, latency) under
+# CF_FIXTURE_DIR; CF_FIXTURE_MODE=replay serves them back without touching the
+# network, sleeping CF_REPLAY_LATENCY seconds per call ("recorded" reuses the
+# measured latency).
+FIXTURE_MODE = os.environ.get("CF_FIXTURE_MODE", "").lower()
+FIXTURE_DIR = os.environ.get("CF_FIXTURE_DIR", "fixtures")
+REPLAY_LATENCY = os.environ.get("CF_REPLAY_LATENCY", "0")
+
+def fixture_path(url):
+    # Keyed by method and query so fixtures replay against any CF_API_BASE
+    relative = url[len(CF_API_BASE):] if url.startswith(CF_API_BASE) else url
+    digest = hashlib.sha1(relative.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(FIXTURE_DIR, f"{api_method(url)}-{digest}.json")
+
+def record_fixture(url, r, latency):
+    path = fixture_path(url)
+    fixture = {
+        "url": url[len(CF_API_BASE):] if url.startswith(CF_API_BASE) else url,
+        "status": r.status_code,
+        "reason": r.reason,
+        "content_type": r.headers.get("Content-Type"),
+        "latency": round(latency, 4),
+        "body": r.content.decode("utf-8", errors="replace"),
+    }
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(fixture, f)
+    os.replace(tmp_path, path)
+    incr("fixtures.recorded")
+
+def replay_fixture(url):
+    path = fixture_path(url)
+    try:
+        with open(path, encoding="utf-8") as f:
+            fixture = json.load(f)
+    except FileNotFoundError:
+        incr("fixtures.missing")
+        raise RuntimeError(f"No recorded fixture for {url} ({path})")
+    if REPLAY_LATENCY == "recorded":
+        delay = fixture.get("latency", 0)
+    else:
+        delay = float(REPLAY_LATENCY)
+    if delay > 0:
+        time.sleep(delay)
+    r = requests.Response()
+    r.url = url
+    r.status_code = fixture["status"]
+    r.reason = fixture.get("reason")
+    r.headers["Content-Type"] = fixture.get("content_type") or "application/json"
+    r.encoding = "utf-8"
+    r._content = fixture["body"].encode("utf-8")
+    r._content_consumed = True
+    incr("fixtures.replayed")
+    return r
+
+def upstream_get(url):
+    if FIXTURE_MODE == "replay":
+        return replay_fixture(url)
+    timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    if FIXTURE_MODE == "record":
+        start = time.perf_counter()
+        r = get_http_session().get(url, timeout=timeout)
+        record_fixture(url, r, time.perf_counter() - start)
+        return r
+    return get_http_session().get(url, timeout=timeout, stream=True)
+
+def is_call_limit_response(r):
+    return r.status_code in (429, 503) and "Call limit exceeded" in r.text
+
+def http_fetch(url, attempts=HTTP_RETRIES + 1):
+    method = api_method(url)
+    breaker = get_breaker(method)
+    if not breaker.allow():
+        incr("breaker.rejected")
+        return None, f"Codeforces API is unavailable ({method} circuit open), please retry shortly"
     logging.info(f"Fetching URL: {url}")
     try:
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        if data['status'] != 'OK':
-            return None, data.get('comment', 'API error')
-        cache[url] = (data['result'], now)
-        return data['result'], None
+        for attempt in range(attempts):
+            # Replayed responses never reach Codeforces, so they skip the rate limiter
+            if FIXTURE_MODE != "replay" and not rate_limiter.acquire(current_priority()):
+                incr("ratelimit.rejected")
+                breaker.release()
+                return None, "Codeforces API is busy, please retry shortly"
+            incr("http.requests")
+            r = upstream_get(url)
+            if is_call_limit_response(r):
+                incr("ratelimit.upstream_throttled")
+                logging.warning(f"Codeforces call limit exceeded for URL: {url}")
+                rate_limiter.penalize()
+            elif r.status_code in HTTP_RETRY_STATUSES and attempt + 1 < attempts:
+                incr("http.status_retries")
+                logging.warning(f"Codeforces returned {r.status_code} for URL: {url}, retrying")
+                r.close()
+                time.sleep(HTTP_RETRY_BACKOFF * 2 ** attempt)
+            else:
+                break
+        else:
+            # Throttled on every attempt: Codeforces is up, just busy, which
+            # says nothing about the circuit's health
+            r.close()
+            breaker.release()
+            return None, "Codeforces API is busy, please retry shortly"
+        with r:
+            if r.status_code == 400:
+                # Codeforces reports bad arguments (e.g. unknown handles) as 400 with a FAILED envelope
+                try:
+                    data = r.json()
+                except ValueError:
+                    data = None
+                if isinstance(data, dict) and data.get('status') == 'FAILED':
+                    breaker.record_success()
+                    return None, data.get('comment', 'API error')
+            r.raise_for_status()
+            # requests already negotiates compression (gzip/deflate, plus br/zstd when installed)
+            if r.headers.get("Content-Encoding"):
+                incr("http.compressed_responses")
+            project = STREAMED_RESULTS.get(method)
+            if project is not None:
+                incr("http.streamed")
+                result = stream_api_result(r.iter_content(chunk_size=STREAM_CHUNK_SIZE), project)
+            else:
+                result = parse_envelope(r.json())
+        breaker.record_success()
+        return result
     except Exception as e:
+        incr("http.errors")
+        breaker.record_failure()
         logging.error(f"Error fetching URL {url}: {e}")
         return None, str(e)
 
-def fetch_json(url):
-    return cached_fetch(url)
+# Per-key in-flight calls: concurrent callers for the same key share one fetch
+class InflightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = (None, None)
 
-def fetch_user_info(handle):
-    url = f"{CF_API_BASE}/user.info?handles={handle}"
-    return fetch_json(url)
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+def singleflight(key, fn):
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = InflightCall()
+            _inflight[key] = call
+    if not leader:
+        incr("singleflight.coalesced")
+        call.done.wait()
+        return call.result
+    incr("singleflight.leaders")
+    try:
+        call.result = fn()
+    except Exception as e:
+        logging.error(f"Error in in-flight call for {key}: {e}")
+        call.result = (None, str(e))
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+        call.done.set()
+    return call.result
 
-def fetch_user_submissions(handle):
-    url = f"{CF_API_BASE}/user.status?handle={handle}&from=1&count=100000"
-    return fetch_json(url)
+def is_inflight(key):
+    with _inflight_lock:
+        return key in _inflight
 
-def fetch_user_rating(handle):
-    url = f"{CF_API_BASE}/user.rating?handle={handle}"
-    return fetch_json(url)
+def inflight_count():
+    with _inflight_lock:
+        return len(_inflight)
 
-def fetch_rated_users():
-    url = f"{CF_API_BASE}/user.ratedList?activeOnly=true"
-    return fetch_json(url)
+def approx_size(obj, sample=16):
+    # Rough deep size in bytes; large containers are extrapolated from a sample
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        items = list(islice(obj.items(), sample))
+        if items:
+            size += len(obj) * sum(approx_size(k) + approx_size(v) for k, v in items) // len(items)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        items = list(islice(obj, sample))
+        if items:
+            size += len(obj) * sum(approx_size(item) for item in items) // len(items)
+    elif isinstance(obj, Record):
+        size += sum(approx_size(getattr(obj, field)) for field in obj.__slots__)
+    return size
 
-def calculate_stats(submissions):
-    total_submissions = len(submissions)
-    accepted_count = 0
-    wrong_answer_count = 0
-    verdict_counter = Counter()
-    attempted_problems = set()
-    solved_problems = set()
-    first_attempt_solved = set()
-    problem_first_submission = {}
-    contests_participated = set()
-
-    difficulty_solved = Counter()
-    topic_solved = Counter()
-
-    for sub in submissions:
-        problem = sub['problem']
-        contest_id = problem.get('contestId')
-        problem_index = problem.get('index')
-        problem_id = (contest_id, problem_index)
-        attempted_problems.add(problem_id)
-        contests_participated.add(contest_id)
-
-        verdict = sub.get('verdict', 'UNKNOWN')
-        verdict_counter[verdict] += 1
-
-        if verdict == "OK":
-            accepted_count += 1
-            solved_problems.add(problem_id)
-            if problem_id not in problem_first_submission:
-                problem_first_submission[problem_id] = verdict
-                first_attempt_solved.add(problem_id)
-            rating = problem.get('rating')
-            tags = problem.get('tags', [])
-            if rating:
-                difficulty_solved[rating] += 1
-            for tag in tags:
-                topic_solved[tag] += 1
+class CacheEntry:
+    __slots__ = ("value", "fetched_at", "expires_at", "size")
+
+    def __init__(self, value, fetched_at, expires_at, size):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+        self.size = size
+
+# Compact JSON as bytes, through orjson when it is installed. Keys are sorted
+# like jsonify does; with orjson non-string keys sort by their string form.
+if orjson is not None:
+    def dumps_json(value):
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+
+    loads_json = orjson.loads
+else:
+    def dumps_json(value):
+        return json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+    loads_json = json.loads
+
+# Lists of records are stored as {"__records__": type name, "rows": [field lists]}
+def encode_payload(value, level=6):
+    if value and isinstance(value, list) and isinstance(value[0], Record):
+        value = {"__records__": type(value[0]).__name__, "rows": [item.as_list() for item in value]}
+    return zlib.compress(dumps_json(value), level)
+
+def decode_payload(blob):
+    value = loads_json(zlib.decompress(blob))
+    if isinstance(value, dict) and "__records__" in value:
+        from_list = RECORD_TYPES[value["__records__"]].from_list
+        return [from_list(row) for row in value["rows"]]
+    return value
+
+# Thread-safe LRU cache bounded by entry count and an approximate byte budget.
+# Entries past their hard expiry are purged every `purge_interval` seconds.
+# With `compress`, values are held as zlib-compressed JSON and decoded on read;
+# the `hot_entries` most recently read values are also kept decoded.
+class LRUCache:
+    def __init__(self, max_entries, max_bytes, purge_interval=60, compress=False, hot_entries=0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.purge_interval = purge_interval
+        self.compress = compress
+        self.hot_entries = hot_entries
+        self.entries = OrderedDict()
+        self.hot = OrderedDict()
+        self.lock = threading.Lock()
+        self.total_bytes = 0
+        self.last_purge = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.hot_hits = 0
+        self.decodes = 0
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return self._materialize(key, entry)
+
+    def peek(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+        return self._materialize(key, entry) if entry is not None else None
+
+    def fetched_at(self, key):
+        # Metadata only: no lookup counted, no decoding, no hot-layer update
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry.fetched_at if entry is not None else None
+
+    def _materialize(self, key, entry):
+        if not self.compress:
+            return entry
+        with self.lock:
+            hot = self.hot.get(key)
+            if hot is not None and hot[0] is entry:
+                self.hot.move_to_end(key)
+                self.hot_hits += 1
+                return CacheEntry(hot[1], entry.fetched_at, entry.expires_at, entry.size)
+        value = decode_payload(entry.value)
+        with self.lock:
+            self.decodes += 1
+            if self.entries.get(key) is entry:
+                self._remember(key, entry, value)
+        return CacheEntry(value, entry.fetched_at, entry.expires_at, entry.size)
+
+    def _remember(self, key, entry, value):
+        if self.hot_entries <= 0:
+            return
+        self.hot[key] = (entry, value)
+        self.hot.move_to_end(key)
+        while len(self.hot) > self.hot_entries:
+            self.hot.popitem(last=False)
+
+    def set(self, key, value, fetched_at, expires_at):
+        if self.compress:
+            stored = encode_payload(value, CACHE_COMPRESS_LEVEL)
+            size = len(stored)
         else:
-            if verdict == "WRONG_ANSWER":
-                wrong_answer_count += 1
-            if problem_id not in problem_first_submission:
-                problem_first_submission[problem_id] = verdict
+            stored = value
+            size = approx_size(value)
+        if size > self.max_bytes:
+            logging.warning(f"Not caching {key}: ~{size} bytes exceeds the cache budget")
+            return
+        with self.lock:
+            self._remove(key)
+            entry = self.entries[key] = CacheEntry(stored, fetched_at, expires_at, size)
+            self.total_bytes += size
+            if self.compress:
+                self._remember(key, entry, value)
+            now = time.time()
+            if now - self.last_purge >= self.purge_interval:
+                self._purge_expired(now)
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.evictions += 1
 
-    unique_attempted = len(attempted_problems)
-    unique_solved = len(solved_problems)
-    problem_solving_rate = round((unique_solved / unique_attempted) * 100, 2) if unique_attempted else 0.0
+    def purge_expired(self):
+        with self.lock:
+            return self._purge_expired(time.time())
 
-    problem_attempts = defaultdict(int)
-    for sub in submissions:
-        pid = (sub['problem'].get('contestId'), sub['problem'].get('index'))
-        problem_attempts[pid] += 1
-    max_attempts = max(problem_attempts.values()) if problem_attempts else 0
-    most_attempted_problems = [pid for pid, c in problem_attempts.items() if c == max_attempts]
+    def _purge_expired(self, now):
+        self.last_purge = now
+        expired = [key for key, entry in self.entries.items() if entry.expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        self.expired += len(expired)
+        return len(expired)
 
-    def format_problem(pid):
-        return f"{pid[0]}-{pid[1]}"
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+        self.hot.pop(key, None)
 
-    return {
-        "total_submissions": total_submissions,
-        "accepted_count": accepted_count,
-        "wrong_answer_count": wrong_answer_count,
-        "unique_attempted": unique_attempted,
-        "unique_solved": unique_solved,
-        "problem_solving_rate": problem_solving_rate,
-        "contests_participated": len(contests_participated),
-        "first_attempt_solved": len(first_attempt_solved),
-        "verdict_counter": dict(verdict_counter),
-        "most_attempted_problems": [format_problem(p) for p in most_attempted_problems],
-        "max_attempts": max_attempts,
-        "difficulty_solved": dict(difficulty_solved),
-        "topic_solved": dict(topic_solved),
-    }
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "approx_bytes": self.total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired_purged": self.expired,
+                "compressed": self.compress,
+                "hot_entries": len(self.hot),
+                "hot_hits": self.hot_hits,
+                "decodes": self.decodes,
+            }
+
+# Small LRU of values computed from cached responses (e.g. columnar
+# submissions). An item is rebuilt when the version of its source changes.
+class DerivedCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    def get(self, key, version, build):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is not None and item[0] == version:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return item[1]
+        value = build()
+        with self.lock:
+            self.entries[key] = (version, value)
+            self.entries.move_to_end(key)
+            self.builds += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+
+    def peek(self, key, version):
+        # The item if it is current, else None; never builds
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None or item[0] != version:
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "builds": self.builds,
+            }
+
+# LRU of per-handle StatsStates, bounded by their estimated size rather than
+# a count: one state holds columns and aggregator tallies for every
+# submission, roughly STATS_STATE_ROW_BYTES per row.
+class StatsStateCache:
+    def __init__(self, max_bytes, row_bytes):
+        self.max_bytes = max_bytes
+        self.row_bytes = row_bytes
+        self.entries = OrderedDict()  # key -> (state, estimated bytes)
+        self.lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return item[0]
+            self.misses += 1
+            state = StatsState()
+            self.entries[key] = (state, 0)
+            return state
+
+    def resize(self, key, state):
+        # Called after a sync; a state evicted meanwhile is not re-added
+        size = len(state.columns) * self.row_bytes
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None or item[0] is not state:
+                return
+            self.total_bytes += size - item[1]
+            self.entries[key] = (state, size)
+            while self.total_bytes > self.max_bytes and self.entries:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+# Optional persistent cache tier shared by all workers on a host. Payloads are
+# stored as zlib-compressed JSON in a SQLite database running in WAL mode.
+# DISK_CACHE_SCHEMA is bumped whenever the payload encoding changes.
+DISK_CACHE_SCHEMA = 2
 
-def analyze_contests(rating_changes):
+class DiskCache:
+    def __init__(self, path, purge_interval=600):
+        self.path = path
+        self.purge_interval = purge_interval
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.last_purge = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+        self.table = f"responses_v{DISK_CACHE_SCHEMA}"
+        conn = self.connection()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, fetched_at REAL NOT NULL, expires_at REAL NOT NULL, payload BLOB NOT NULL)"
+        )
+        # Rows from the previous schema can't be decoded any more
+        conn.execute("DROP TABLE IF EXISTS responses")
+
+    def connection(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def count(self, field):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def get(self, key):
+        try:
+            row = self.connection().execute(
+                f"SELECT fetched_at, expires_at, payload FROM {self.table} WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                self.count("misses")
+                return None
+            fetched_at, expires_at, payload = row
+            value = decode_payload(payload)
+        except Exception as e:
+            self.count("errors")
+            logging.error(f"Disk cache read failed for {key}: {e}")
+            return None
+        self.count("hits")
+        return CacheEntry(value, fetched_at, expires_at, len(payload))
+
+    def fetched_at(self, key):
+        # Like get, but only reports when the stored value was fetched; not counted
+        try:
+            row = self.connection().execute(
+                f"SELECT fetched_at FROM {self.table} WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        except Exception as e:
+            self.count("errors")
+            logging.error(f"Disk cache read failed for {key}: {e}")
+            return None
+        return row[0] if row is not None else None
+
+    def set(self, key, value, fetched_at, expires_at):
+        try:
+            payload = encode_payload(value)
+            conn = self.connection()
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, fetched_at, expires_at, payload) VALUES (?, ?, ?, ?)",
+                (key, fetched_at, expires_at, payload),
+            )
+            now = time.time()
+            if now - self.last_purge >= self.purge_interval:
+                self.last_purge = now
+                conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+        except Exception as e:
+            self.count("errors")
+            logging.error(f"Disk cache write failed for {key}: {e}")
+            return
+        self.count("writes")
+
+    def stats(self):
+        with self.lock:
+            return {
+                "path": self.path,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "errors": self.errors,
+            }
+
+# In-memory response cache. Entries younger than `expiry` are fresh; until
+# `stale_expiry` they are served stale while a background refresh runs. Both
+# tiers keep them CACHE_STALE_IF_ERROR seconds longer, served only while the
+# method's circuit is open.
+CACHE_MAX_ENTRIES = int(os.environ.get("CF_CACHE_MAX_ENTRIES", 1000))
+CACHE_MAX_BYTES = int(float(os.environ.get("CF_CACHE_MAX_MB", 256)) * 1024 * 1024)
+CACHE_PURGE_INTERVAL = float(os.environ.get("CF_CACHE_PURGE_INTERVAL", 60))
+CACHE_COMPRESS = os.environ.get("CF_CACHE_COMPRESS", "0").lower() in ("1", "true", "yes")
+CACHE_COMPRESS_LEVEL = int(os.environ.get("CF_CACHE_COMPRESS_LEVEL", 1))
+CACHE_STALE_TTL = float(os.environ.get("CF_CACHE_STALE_TTL", 300))
+CACHE_STALE_IF_ERROR = float(os.environ.get("CF_CACHE_STALE_IF_ERROR", 3600))
+CACHE_HOT_ENTRIES = int(os.environ.get("CF_CACHE_HOT_ENTRIES", 32))
+REFRESH_WORKERS = int(os.environ.get("CF_REFRESH_WORKERS", 2))
+cache = LRUCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_PURGE_INTERVAL, CACHE_COMPRESS, CACHE_HOT_ENTRIES)
+DERIVED_CACHE_ENTRIES = int(os.environ.get("CF_DERIVED_CACHE_ENTRIES", 256))
+derived_cache = DerivedCache(DERIVED_CACHE_ENTRIES)
+STATS_STATE_MAX_BYTES = int(float(os.environ.get("CF_STATS_STATE_MAX_MB", 64)) * 1024 * 1024)
+STATS_STATE_ROW_BYTES = 96  # measured ~93 bytes per submission
+stats_states = StatsStateCache(STATS_STATE_MAX_BYTES, STATS_STATE_ROW_BYTES)
+DISK_CACHE_PATH = os.environ.get("CF_DISK_CACHE_PATH")
+disk_cache = DiskCache(DISK_CACHE_PATH) if DISK_CACHE_PATH else None
+refresh_executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="cf-refresh")
+
+def lookup_entry(url):
+    # Memory tier first, then the disk tier; disk hits are promoted to memory
+    entry = cache.get(url)
+    if entry is None and disk_cache is not None:
+        entry, _ = singleflight(f"disk:{url}", lambda: (disk_cache.get(url), None))
+        if entry is not None:
+            cache.set(url, entry.value, entry.fetched_at, entry.expires_at)
+    return entry
+
+def cached_fetched_at(url):
+    # When the cached copy of url (memory or disk) was fetched, without
+    # counting a lookup, decoding or promoting it; None if neither tier has it
+    fetched_at = cache.fetched_at(url)
+    if fetched_at is not None:
+        return fetched_at
+    if disk_cache is not None:
+        return disk_cache.fetched_at(url)
+    return None
+
+# Raised by cached_fetch_entry in cache-only mode (see submit_fetch) when the
+# call would have to wait on Codeforces
+class CacheMiss(Exception):
+    pass
+
+def load_into_cache(url, expiry, stale_expiry, loader=None, retain=0):
+    # Another leader may have filled the cache while we were queued
+    fetched_at = cache.fetched_at(url)
+    if fetched_at is not None and time.time() - fetched_at < expiry:
+        entry = cache.peek(url)
+        if entry is not None:
+            return entry, None
+    now = time.time()
+    if loader is None:
+        data, err = http_fetch(url)
+    else:
+        # Custom loaders receive the last known value (possibly expired) to build on
+        entry = cache.peek(url)
+        data, err = loader(entry.value if entry is not None else None)
+    if err is not None:
+        return None, err
+    # Kept past the stale window as a fallback while Codeforces is failing;
+    # `retain` can keep it longer still for loaders to reuse
+    expires_at = now + max(stale_expiry + CACHE_STALE_IF_ERROR, retain)
+    cache.set(url, data, now, expires_at)
+    if disk_cache is not None:
+        disk_cache.set(url, data, now, expires_at)
+    return CacheEntry(data, now, expires_at, 0), None
+
+def background_refresh(url, expiry, stale_expiry, loader, retain):
+    incr("cache.background_refreshes")
+    fetch_context.priority = PRIORITY_BACKGROUND
+    try:
+        _, err = singleflight(url, lambda: load_into_cache(url, expiry, stale_expiry, loader, retain))
+    finally:
+        fetch_context.priority = PRIORITY_INTERACTIVE
+    if err:
+        logging.warning(f"Background refresh failed for URL {url}: {err}")
+
+def schedule_refresh(url, expiry, stale_expiry, loader, retain):
+    if is_inflight(url):
+        return
+    refresh_executor.submit(background_refresh, url, expiry, stale_expiry, loader, retain)
+
+def cached_fetch_entry(url, expiry=60, stale_expiry=None, loader=None, retain=0):
+    # Returns the CacheEntry rather than its value so callers can see when the
+    # value was fetched (and key derived data on it)
+    if stale_expiry is None:
+        stale_expiry = max(expiry, CACHE_STALE_TTL)
+    if getattr(fetch_context, "cache_only", False):
+        fetched_at = cached_fetched_at(url)
+        if fetched_at is None or time.time() - fetched_at >= stale_expiry:
+            raise CacheMiss(url)
+    entry = lookup_entry(url)
+    if entry is not None:
+        age = time.time() - entry.fetched_at
+        if age < expiry:
+            incr("cache.hits")
+            logging.info(f"Cache hit for URL: {url}")
+            return entry, None
+        if age < stale_expiry:
+            incr("cache.stale_hits")
+            logging.info(f"Serving stale cache for URL: {url}")
+            schedule_refresh(url, expiry, stale_expiry, loader, retain)
+            return entry, None
+        logging.info(f"Cache expired for URL: {url}")
+    incr("cache.misses")
+    fresh, err = singleflight(url, lambda: load_into_cache(url, expiry, stale_expiry, loader, retain))
+    if err and entry is not None and get_breaker(api_method(url)).is_open():
+        # Codeforces is failing; old data beats an error page
+        incr("cache.stale_on_error")
+        logging.warning(f"Serving expired cache for URL {url} while its circuit is open")
+        return entry, None
+    return fresh, err
+
+# Cache lifetimes per Codeforces method as (fresh, stale) seconds. Override
+# with CF_TTL_<METHOD> / CF_STALE_TTL_<METHOD>, e.g. CF_TTL_USER_RATEDLIST=7200.
+DEFAULT_TTL_POLICY = {
+    "user.ratedList": (3600, 6 * 3600),
+    "user.rating": (600, 3600),
+    "user.status": (60, 600),
+    "user.info": (60, 300),
+    "contest.list": (3600, 24 * 3600),
+    "problemset.problems": (6 * 3600, 24 * 3600),
+}
+
+def load_ttl_policy():
+    policy = {}
+    for method, (ttl, stale_ttl) in DEFAULT_TTL_POLICY.items():
+        key = method.replace(".", "_").upper()
+        ttl = float(os.environ.get(f"CF_TTL_{key}", ttl))
+        stale_ttl = float(os.environ.get(f"CF_STALE_TTL_{key}", stale_ttl))
+        policy[method] = (ttl, max(ttl, stale_ttl))
+    return policy
+
+TTL_POLICY = load_ttl_policy()
+
+def api_method(url):
+    return url.split("?", 1)[0].rsplit("/", 1)[-1]
+
+def fetch_json_entry(url, loader=None, retain=0):
+    expiry, stale_expiry = TTL_POLICY.get(api_method(url), (60, None))
+    return cached_fetch_entry(url, expiry, stale_expiry, loader, retain)
+
+# user.info accepts many handles per call, so concurrent cache misses arriving
+# within a short window are merged into a single upstream request.
+USER_INFO_BATCH_WINDOW = float(os.environ.get("CF_USER_INFO_BATCH_WINDOW", 0.02))
+USER_INFO_BATCH_MAX = int(os.environ.get("CF_USER_INFO_BATCH_MAX", 100))
+MISSING_HANDLE_RE = re.compile(r"User with handle (\S+) not found")
+
+class UserInfoBatcher:
+    def __init__(self, window, max_size):
+        self.window = window
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.current = None
+
+    def lookup(self, handle):
+        key = handle.lower()
+        with self.lock:
+            batch = self.current
+            leader = batch is None
+            if leader:
+                batch = self.current = {}
+            if key not in batch:
+                batch[key] = (handle, Future())
+            future = batch[key][1]
+            full = len(batch) >= self.max_size
+            if full:
+                self.current = None
+        if full:
+            self.flush(batch)
+        elif leader:
+            time.sleep(self.window)
+            with self.lock:
+                # The batch may already have been flushed by a caller that filled it
+                owned = self.current is batch
+                if owned:
+                    self.current = None
+            if owned:
+                self.flush(batch)
+        return future.result()
+
+    def flush(self, batch):
+        pending = dict(batch)
+        incr("user_info.batches")
+        incr("user_info.batched_handles", len(pending))
+        try:
+            while pending:
+                keys = list(pending)
+                url = f"{CF_API_BASE}/user.info?handles={';'.join(pending[key][0] for key in keys)}"
+                result, err = http_fetch(url)
+                if err is None and len(result) == len(keys):
+                    for key, info in zip(keys, result):
+                        pending.pop(key)[1].set_result(([info], None))
+                    return
+                # One unknown handle fails the whole call; answer it and retry the rest
+                match = MISSING_HANDLE_RE.search(err or "")
+                missing = match.group(1).lower() if match else None
+                if missing not in pending:
+                    break
+                incr("user_info.batch_retries")
+                pending.pop(missing)[1].set_result((None, err))
+            for _, future in pending.values():
+                future.set_result((None, err or "Unexpected user.info response"))
+        except Exception as e:
+            logging.error(f"user.info batch failed: {e}")
+            for _, future in pending.values():
+                if not future.done():
+                    future.set_result((None, str(e)))
+
+user_info_batcher = UserInfoBatcher(USER_INFO_BATCH_WINDOW, USER_INFO_BATCH_MAX)
+
+def user_info_url(handle):
+    return f"{CF_API_BASE}/user.info?handles={handle}"
+
+def fetch_user_info_entry(handle):
+    url = user_info_url(handle)
+    if ";" in handle:
+        return fetch_json_entry(url)
+    return fetch_json_entry(url, loader=lambda previous: user_info_batcher.lookup(handle))
+
+def fetch_user_info(handle):
+    entry, err = fetch_user_info_entry(handle)
+    return (entry.value if entry is not None else None), err
+
+# Incremental submission sync: known histories are kept for SUBMISSIONS_RETAIN
+# seconds and refreshed by reading only the newest pages of user.status.
+# Verdicts of older submissions can still change (system tests, hacks,
+# rejudges), so a full download is forced every SUBMISSIONS_FULL_SYNC_INTERVAL.
+SUBMISSIONS_RETAIN = float(os.environ.get("CF_SUBMISSIONS_RETAIN", 7 * 24 * 3600))
+SUBMISSIONS_PAGE_SIZE = int(os.environ.get("CF_SUBMISSIONS_PAGE_SIZE", 100))
+SUBMISSIONS_MAX_PAGES = int(os.environ.get("CF_SUBMISSIONS_MAX_PAGES", 10))
+SUBMISSIONS_FULL_SYNC_INTERVAL = float(os.environ.get("CF_SUBMISSIONS_FULL_SYNC_INTERVAL", 3600))
+PENDING_VERDICTS = {None, "TESTING"}
+
+# lowercase handle -> time of the last full download in this process, oldest
+# first. Times past the interval are dropped (the next sync is full either
+# way), and at most CACHE_MAX_ENTRIES handles are tracked.
+_full_syncs = OrderedDict()
+_full_syncs_lock = threading.Lock()
+
+def full_sync_submissions(handle, url):
+    incr("submissions.full_syncs")
+    data, err = http_fetch(url)
+    if err is None:
+        now = time.time()
+        with _full_syncs_lock:
+            _full_syncs[handle.lower()] = now
+            _full_syncs.move_to_end(handle.lower())
+            while _full_syncs and (
+                len(_full_syncs) > CACHE_MAX_ENTRIES
+                or now - next(iter(_full_syncs.values())) >= SUBMISSIONS_FULL_SYNC_INTERVAL
+            ):
+                _full_syncs.popitem(last=False)
+    return data, err
+
+def sync_submissions(handle, known):
+    full_url = user_status_url(handle)
+    with _full_syncs_lock:
+        last_full_sync = _full_syncs.get(handle.lower(), 0)
+    # Histories loaded from the disk tier have no known full sync in this process
+    if not known or time.time() - last_full_sync >= SUBMISSIONS_FULL_SYNC_INTERVAL:
+        return full_sync_submissions(handle, full_url)
+
+    # Submissions are returned newest first. Read pages until we reach the newest
+    # known submission, or the oldest one still being judged so its verdict updates.
+    pending = [sub.id for sub in known if sub.verdict in PENDING_VERDICTS]
+    boundary = min(pending) if pending else known[0].id
+    fetched = []
+    start = 1
+    for _ in range(SUBMISSIONS_MAX_PAGES):
+        page_url = f"{CF_API_BASE}/user.status?handle={handle}&from={start}&count={SUBMISSIONS_PAGE_SIZE}"
+        page, err = http_fetch(page_url)
+        if err:
+            return None, err
+        fetched.extend(page)
+        if len(page) < SUBMISSIONS_PAGE_SIZE or page[-1].id <= boundary:
+            break
+        start += SUBMISSIONS_PAGE_SIZE
+    else:
+        # Too far behind; one full download is cheaper than more pages
+        return full_sync_submissions(handle, full_url)
+
+    incr("submissions.incremental_syncs")
+    if not fetched:
+        return known, None
+    # New submissions shift later pages, so the same id may appear twice
+    merged = []
+    seen = set()
+    for sub in fetched:
+        if sub.id not in seen:
+            seen.add(sub.id)
+            merged.append(sub)
+    oldest_fetched = merged[-1].id
+    merged.extend(sub for sub in known if sub.id < oldest_fetched)
+    return merged, None
+
+def user_status_url(handle):
+    return f"{CF_API_BASE}/user.status?handle={handle}&from=1&count=100000"
+
+def fetch_user_submissions_entry(handle):
+    url = user_status_url(handle)
+    return fetch_json_entry(url, loader=lambda known: sync_submissions(handle, known), retain=SUBMISSIONS_RETAIN)
+
+def user_rating_url(handle):
+    return f"{CF_API_BASE}/user.rating?handle={handle}"
+
+def fetch_user_rating_entry(handle):
+    url = user_rating_url(handle)
+    return fetch_json_entry(url)
+
+# Global and per-country positions from user.ratedList, built once per fetch of
+# the list and swapped in atomically, so rank lookups are dictionary hits.
+# Sorted rating arrays answer "what percentile is rating X" by binary search.
+class RankIndex:
+    def __init__(self, rated_users, version=None):
+        self.version = version
+        self.total_users = len(rated_users)
+        self.country_sizes = Counter()
+        # lowercase handle -> (global position, country, position within country)
+        self.positions = {}
+        ratings = []
+        country_ratings = defaultdict(list)
+        for i, u in enumerate(rated_users):
+            country = u.country
+            self.country_sizes[country] += 1
+            handle = u.handle.lower()
+            if handle not in self.positions:
+                self.positions[handle] = (i + 1, country, self.country_sizes[country])
+            rating = u.rating
+            if rating is not None:
+                ratings.append(rating)
+                country_ratings[country].append(rating)
+        ratings.sort()
+        for values in country_ratings.values():
+            values.sort()
+        self.ratings = ratings
+        self.country_ratings = dict(country_ratings)
+
+    def rating_percentile(self, rating, country=None, by_country=False):
+        # Share of active rated users (optionally within `country`) rated at or below `rating`
+        ratings = self.country_ratings.get(country, []) if by_country else self.ratings
+        if not ratings:
+            return None
+        return round(100 * bisect.bisect_right(ratings, rating) / len(ratings), 2)
+
+EMPTY_RANK_INDEX = RankIndex([])
+_rank_index = EMPTY_RANK_INDEX
+_rank_index_lock = threading.Lock()
+
+def rated_list_url():
+    return f"{CF_API_BASE}/user.ratedList?activeOnly=true"
+
+def fetch_rank_index():
+    global _rank_index
+    url = rated_list_url()
+    entry, err = fetch_json_entry(url)
+    if err:
+        return None, err
+    index = _rank_index
+    if index.version != entry.fetched_at:
+        with _rank_index_lock:
+            index = _rank_index
+            if index.version != entry.fetched_at:
+                incr("rank_index.builds")
+                index = RankIndex(entry.value, entry.fetched_at)
+                _rank_index = index
+    return index, None
+
+# Contest id -> (scoring type, division, start time, duration) from
+# contest.list, rebuilt once per fetch of the list like the rank index.
+# Codeforces doesn't report divisions, so they are read from the contest name
+# once here rather than on every request.
+DIVISION_RE = re.compile(r"\bDiv\.\s*(\d)")
+
+def classify_contest(name):
+    name = name or ""
+    if "Educational" in name:
+        return "Educational"
+    if "Global Round" in name:
+        return "Global"
+    divisions = set(DIVISION_RE.findall(name))
+    if {"1", "2"} <= divisions:
+        return "Div. 1 + Div. 2"
+    for division in ("1", "2", "3", "4"):
+        if division in divisions:
+            return f"Div. {division}"
+    return "Other"
+
+class ContestIndex:
+    def __init__(self, contests, version=None):
+        self.version = version
+        self.contests = {
+            c.id: (c.type, classify_contest(c.name), c.start_time, c.duration) for c in contests
+        }
+
+    def division(self, contest_id, contest_name):
+        # Contests newer than the cached list fall back to their name
+        contest = self.contests.get(contest_id)
+        return contest[1] if contest is not None else classify_contest(contest_name)
+
+EMPTY_CONTEST_INDEX = ContestIndex([])
+_contest_index = EMPTY_CONTEST_INDEX
+_contest_index_lock = threading.Lock()
+
+def fetch_contest_index():
+    global _contest_index
+    url = f"{CF_API_BASE}/contest.list?gym=false"
+    entry, err = fetch_json_entry(url)
+    if err:
+        return None, err
+    index = _contest_index
+    if index.version != entry.fetched_at:
+        with _contest_index_lock:
+            index = _contest_index
+            if index.version != entry.fetched_at:
+                incr("contest_index.builds")
+                index = ContestIndex(entry.value, entry.fetched_at)
+                _contest_index = index
+    return index, None
+
+_contest_index_refreshing = False
+
+def refresh_contest_index():
+    global _contest_index_refreshing
+    fetch_context.priority = PRIORITY_BACKGROUND
+    try:
+        _, err = fetch_contest_index()
+        if err:
+            logging.warning(f"Contest list refresh failed: {err}")
+    finally:
+        fetch_context.priority = PRIORITY_INTERACTIVE
+        with _contest_index_lock:
+            _contest_index_refreshing = False
+
+def current_contest_index():
+    # Never waits on Codeforces: returns the index as of the last fetch and
+    # refreshes contest.list in the background when it is missing or expired.
+    # Until then, divisions fall back to contest names.
+    global _contest_index_refreshing
+    url = f"{CF_API_BASE}/contest.list?gym=false"
+    expiry, _ = TTL_POLICY.get("contest.list", (60, None))
+    fetched_at = cached_fetched_at(url)
+    index = _contest_index
+    if fetched_at is None or time.time() - fetched_at >= expiry or index.version != fetched_at:
+        with _contest_index_lock:
+            if _contest_index_refreshing:
+                return index
+            _contest_index_refreshing = True
+        refresh_executor.submit(refresh_contest_index)
+    return index
+
+# Column-oriented view of a submission list, oldest first, so new submissions
+# are appended. Problems, verdicts, languages and tags are interned: each
+# submission costs a few small integers and a tag bitmask instead of nested dicts.
+OK_VERDICT = 0  # "OK" is always verdict code 0
+
+class SubmissionColumns:
+    def __init__(self, submissions=()):
+        self.problems = []  # problem code -> (contestId, index)
+        self.verdicts = ["OK"]  # verdict code -> verdict name
+        self.languages = []  # language code -> language name
+        self.tags = []  # bit -> tag name
+        self.problem = array("i")
+        self.verdict = array("H")
+        self.accepted = bytearray()  # 1 where the verdict is OK
+        self.rating = array("i")  # 0 when the problem has no rating
+        self.tag_mask = []
+        self.language = array("H")
+        self.problem_codes = {}
+        self.verdict_codes = {"OK": OK_VERDICT}
+        self.language_codes = {}
+        self.tag_bits = {}
+        self.extend(submissions)
+
+    def extend(self, submissions):
+        problem_codes = self.problem_codes
+        verdict_codes = self.verdict_codes
+        language_codes = self.language_codes
+        tag_bits = self.tag_bits
+        for sub in submissions:
+            pid = (sub.problem_contest_id, sub.problem_index)
+            code = problem_codes.get(pid)
+            if code is None:
+                code = problem_codes[pid] = len(self.problems)
+                self.problems.append(pid)
+            self.problem.append(code)
+
+            verdict = sub.verdict if sub.verdict is not None else 'UNKNOWN'
+            code = verdict_codes.get(verdict)
+            if code is None:
+                code = verdict_codes[verdict] = len(self.verdicts)
+                self.verdicts.append(verdict)
+            self.verdict.append(code)
+            self.accepted.append(code == OK_VERDICT)
+
+            language = sub.language if sub.language is not None else 'Unknown'
+            code = language_codes.get(language)
+            if code is None:
+                code = language_codes[language] = len(self.languages)
+                self.languages.append(language)
+            self.language.append(code)
+
+            self.rating.append(sub.rating or 0)
+
+            mask = 0
+            for tag in sub.tags:
+                bit = tag_bits.get(tag)
+                if bit is None:
+                    bit = tag_bits[tag] = len(self.tags)
+                    self.tags.append(tag)
+                mask |= 1 << bit
+            self.tag_mask.append(mask)
+
+    def __len__(self):
+        return len(self.problem)
+
+# Metrics for calculate_stats. Every registered aggregator is handed each new
+# batch of rows once, oldest first, as update(columns, start) over the column
+# slices from `start`; aggregators count with Counter/compress over those
+# slices rather than per row. Later batches are applied to the same state.
+# finalize() adds the aggregator's fields to the stats dict.
+STATS_AGGREGATORS = []
+
+def register_aggregator(cls):
+    STATS_AGGREGATORS.append(cls)
+    return cls
+
+class Aggregator:
+    def __init__(self, columns):
+        self.columns = columns
+
+@register_aggregator
+class VerdictAggregator(Aggregator):
+    def __init__(self, columns):
+        super().__init__(columns)
+        self.counts = Counter()
+
+    def update(self, columns, start):
+        self.counts.update(columns.verdict[start:])
+
+    def finalize(self, stats):
+        verdict_counter = {self.columns.verdicts[code]: count for code, count in self.counts.items()}
+        stats["total_submissions"] = sum(self.counts.values())
+        stats["accepted_count"] = verdict_counter.get("OK", 0)
+        stats["wrong_answer_count"] = verdict_counter.get("WRONG_ANSWER", 0)
+        stats["verdict_counter"] = verdict_counter
+
+@register_aggregator
+class AttemptsAggregator(Aggregator):
+    def __init__(self, columns):
+        super().__init__(columns)
+        self.attempts = Counter()
+
+    def update(self, columns, start):
+        self.attempts.update(columns.problem[start:])
+
+    def finalize(self, stats):
+        problems = self.columns.problems
+        max_attempts = max(self.attempts.values()) if self.attempts else 0
+        stats["unique_attempted"] = len(self.attempts)
+        stats["contests_participated"] = len({problems[code][0] for code in self.attempts})
+        # Most recently attempted first: one pass from the newest row, stopping
+        # once every tied problem has been seen
+        tied = {code for code, c in self.attempts.items() if c == max_attempts}
+        most_attempted = []
+        for code in reversed(self.columns.problem):
+            if code in tied:
+                tied.discard(code)
+                most_attempted.append(code)
+                if not tied:
+                    break
+        stats["most_attempted_problems"] = [f"{problems[code][0]}-{problems[code][1]}" for code in most_attempted]
+        stats["max_attempts"] = max_attempts
+
+@register_aggregator
+class SolvedAggregator(Aggregator):
+    def __init__(self, columns):
+        super().__init__(columns)
+        self.solved = set()
+
+    def update(self, columns, start):
+        self.solved.update(compress(columns.problem[start:], columns.accepted[start:]))
+
+    def finalize(self, stats):
+        # Every interned problem was attempted at least once
+        unique_attempted = len(self.columns.problems)
+        unique_solved = len(self.solved)
+        stats["unique_solved"] = unique_solved
+        stats["problem_solving_rate"] = round((unique_solved / unique_attempted) * 100, 2) if unique_attempted else 0.0
+
+@register_aggregator
+class FirstTryAggregator(Aggregator):
+    def __init__(self, columns):
+        super().__init__(columns)
+        self.latest_verdicts = {}
+
+    def update(self, columns, start):
+        # Counted against the most recent verdict for each problem
+        self.latest_verdicts.update(zip(columns.problem[start:], columns.verdict[start:]))
+
+    def finalize(self, stats):
+        stats["first_attempt_solved"] = sum(1 for verdict in self.latest_verdicts.values() if verdict == OK_VERDICT)
+
+@register_aggregator
+class DifficultyAggregator(Aggregator):
+    def __init__(self, columns):
+        super().__init__(columns)
+        self.solved = Counter()
+
+    def update(self, columns, start):
+        self.solved.update(compress(columns.rating[start:], columns.accepted[start:]))
+
+    def finalize(self, stats):
+        stats["difficulty_solved"] = {rating: count for rating, count in self.solved.items() if rating}
+
+@register_aggregator
+class TagsAggregator(Aggregator):
+    def __init__(self, columns):
+        super().__init__(columns)
+        self.masks = Counter()
+
+    def update(self, columns, start):
+        self.masks.update(compress(columns.tag_mask[start:], columns.accepted[start:]))
+
+    def finalize(self, stats):
+        topic_solved = Counter()
+        for mask, count in self.masks.items():
+            while mask:
+                low = mask & -mask
+                topic_solved[self.columns.tags[low.bit_length() - 1]] += count
+                mask ^= low
+        stats["topic_solved"] = dict(topic_solved)
+
+@register_aggregator
+class LanguagesAggregator(Aggregator):
+    def __init__(self, columns):
+        super().__init__(columns)
+        self.counts = Counter()
+
+    def update(self, columns, start):
+        self.counts.update(columns.language[start:])
+
+    def finalize(self, stats):
+        stats["language_counter"] = {self.columns.languages[code]: count for code, count in self.counts.items()}
+
+def verdicts_checksum(submissions):
+    # Changes when any (id, verdict) pair in `submissions` does
+    return sum(map(hash, map(attrgetter("id", "verdict"), submissions)))
+
+# Aggregate state for one handle. Submissions newer than high_water are
+# applied as deltas; the state is rebuilt when the rest of the list no longer
+# matches what was applied (count or verdicts), e.g. after system tests, a
+# hack or a rejudge.
+class StatsState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.columns = SubmissionColumns()
+        self.aggregators = [cls(self.columns) for cls in STATS_AGGREGATORS]
+        self.high_water = 0
+        self.checksum = 0  # verdicts_checksum of the applied submissions
+
+    def sync(self, submissions):
+        # submissions are newest first, as returned by user.status
+        new = 0
+        while new < len(submissions) and submissions[new].id > self.high_water:
+            new += 1
+        if (len(submissions) - new != len(self.columns)
+                or verdicts_checksum(islice(submissions, new, None)) != self.checksum):
+            incr("stats.full_recomputes")
+            self.reset()
+            new = len(submissions)
+        elif new:
+            incr("stats.incremental_updates")
+        if not new:
+            return
+        added = submissions[new - 1::-1]
+        start = len(self.columns)
+        self.columns.extend(added)
+        for aggregator in self.aggregators:
+            aggregator.update(self.columns, start)
+        self.checksum += verdicts_checksum(added)
+        self.high_water = max(self.high_water, added[-1].id)
+
+    def stats(self):
+        stats = {}
+        for aggregator in self.aggregators:
+            aggregator.finalize(stats)
+        return stats
+
+def calculate_stats(submissions):
+    state = StatsState()
+    state.sync(submissions)
+    return state.stats()
+
+def handle_stats(handle, submissions):
+    # States keep themselves current against whatever submission list they
+    # are given; the cache only bounds how many rows are kept in memory
+    key = handle.lower()
+    state = stats_states.get(key)
+    with state.lock:
+        state.sync(submissions)
+        stats_states.resize(key, state)
+        return state.stats()
+
+def analyze_contests(rating_changes, contest_index):
     total_contests = len(rating_changes)
     contests_skipped = "Not Available"  # Placeholder, needs contest calendar for precise calculation
 
@@ -142,20 +1728,12 @@ def analyze_contests(rating_changes):
     best_rank_overall = None
 
     for entry in rating_changes:
-        contest_name = entry['contestName']
-        rank = entry['rank']
-        new_rating = entry['newRating']
+        contest_name = entry.contest_name
+        rank = entry.rank
+        new_rating = entry.new_rating
         highest_rating = max(highest_rating, new_rating)
 
-        division = None
-        if "Div. 1" in contest_name:
-            division = "Div. 1"
-        elif "Div. 2" in contest_name:
-            division = "Div. 2"
-        elif "Div. 3" in contest_name:
-            division = "Div. 3"
-        else:
-            division = "Other"
+        division = contest_index.division(entry.contest_id, contest_name)
 
         if division not in best_rank_by_division or rank < best_rank_by_division[division]:
             best_rank_by_division[division] = rank
@@ -171,27 +1749,23 @@ def analyze_contests(rating_changes):
         "best_rank_overall": best_rank_overall,
     }
 
-def get_user_global_country_rank(user_info, rated_users):
+def get_user_global_country_rank(user_info, rank_index):
     country = user_info.get("country")
     handle = user_info.get("handle")
 
     global_rank = None
     country_rank = None
-    total_users = len(rated_users)
-    country_users = [u for u in rated_users if u.get("country") == country]
-
-    for i, u in enumerate(rated_users):
-        if u['handle'].lower() == handle.lower():
-            global_rank = i + 1
-            break
+    total_users = rank_index.total_users
+    country_total = rank_index.country_sizes[country]
 
-    for i, u in enumerate(country_users):
-        if u['handle'].lower() == handle.lower():
-            country_rank = i + 1
-            break
+    position = rank_index.positions.get(handle.lower())
+    if position is not None:
+        global_rank = position[0]
+        if position[1] == country:
+            country_rank = position[2]
 
     global_percentile = round(100 * (1 - (global_rank - 1) / total_users), 2) if global_rank else None
-    country_percentile = round(100 * (1 - (country_rank - 1) / len(country_users)), 2) if country_rank else None
+    country_percentile = round(100 * (1 - (country_rank - 1) / country_total), 2) if country_rank else None
 
     return {
         "global_rank": global_rank,
@@ -217,20 +1791,32 @@ def safe_get_int(value, default=0):
     except Exception:
         return default
 
-@app.route('/api/stats')
-def get_stats():
-    handle = request.args.get('handle')
-    if not handle:
-        return jsonify({"error": "No handle provided"}), 400
-
-    logging.info(f"Request for stats of handle: {handle}")
-
-    user_info_list, err = fetch_user_info(handle)
-    if err or not user_info_list:
-        return jsonify({"error": f"User info error: {err or 'No user found'}"}), 400
+def set_freshness_headers(response, etag, inputs):
+    # `inputs` are (method, fetched_at) pairs; the response stays fresh for as
+    # long as all of them do under the TTL policy
+    now = time.time()
+    max_age = min(fetched_at + TTL_POLICY.get(method, (60, None))[0] - now for method, fetched_at in inputs)
+    response.set_etag(etag)
+    response.last_modified = max(fetched_at for _, fetched_at in inputs)
+    response.cache_control.public = True
+    response.cache_control.max_age = max(0, int(max_age))
 
-    user_info = user_info_list[0]
+def submit_fetch(fn, *args):
+    # Calls the cache can answer (fresh or stale) run inline in the request
+    # thread; only those that must wait on Codeforces go to fetch_executor
+    fetch_context.cache_only = True
+    try:
+        result = fn(*args)
+    except CacheMiss:
+        return fetch_executor.submit(fn, *args)
+    finally:
+        fetch_context.cache_only = False
+    incr("fetch.inline")
+    future = Future()
+    future.set_result(result)
+    return future
 
+def build_stats_response(handle, user_info, submissions, rating_changes, rank_index, contest_index):
     last_online = convert_timestamp(user_info.get("lastOnlineTimeSeconds"))
     member_since = convert_timestamp(user_info.get("registrationTimeSeconds"))
 
@@ -239,32 +1825,20 @@ def get_stats():
     current_rank = user_info.get("rank") or "Unrated"
     max_rank = user_info.get("maxRank") or "Unrated"
 
-    submissions, err = fetch_user_submissions(handle)
-    if err:
-        return jsonify({"error": f"Submissions error: {err}"}), 400
-
-    rating_changes, err = fetch_user_rating(handle)
-    if err:
-        return jsonify({"error": f"User rating error: {err}"}), 400
-
-    rated_users, err = fetch_rated_users()
-    if err:
-        rated_users = []
-
-    stats = calculate_stats(submissions)
-    contest_stats = analyze_contests(rating_changes)
-    rank_stats = get_user_global_country_rank(user_info, rated_users)
+    stats = handle_stats(handle, submissions)
+    contest_stats = analyze_contests(rating_changes, contest_index)
+    rank_stats = get_user_global_country_rank(user_info, rank_index)
 
     best_contest_position = None
     if rating_changes:
-        best_contest_position = min((entry.get('rank', float('inf')) for entry in rating_changes), default=None)
+        best_contest_position = min((entry.rank for entry in rating_changes if entry.rank is not None), default=None)
     if best_contest_position is None or best_contest_position == float('inf'):
         best_contest_position = "N/A"
 
     hacks_successful = user_info.get("successfulHackCount", 0)
     hacks_attempted = user_info.get("hackAttemptCount", 0)
 
-    result = {
+    return {
         "handle": handle,
         "user_info": {
             "avatar": user_info.get("avatar"),
@@ -287,7 +1861,147 @@ def get_stats():
         "error": None,
     }
 
-    return jsonify(result)
+# Inputs of a stats response, in the order of its version tuple
+STATS_INPUTS = ("user.info", "user.status", "user.rating", "user.ratedList", "contest.list")
+
+def fresh_stats_version(handle):
+    # The version of handle's stats response from cache metadata alone, or
+    # None unless every upstream input is cached and fresh. Nothing is
+    # decoded, so a 304 or a derived-cache hit costs no payload loads.
+    now = time.time()
+    version = []
+    for url in (user_info_url(handle), user_status_url(handle), user_rating_url(handle), rated_list_url()):
+        fetched_at = cached_fetched_at(url)
+        if fetched_at is None or now - fetched_at >= TTL_POLICY.get(api_method(url), (60, None))[0]:
+            return None
+        version.append(fetched_at)
+    if _rank_index.version != version[-1]:
+        return None
+    version.append(current_contest_index().version)
+    return tuple(version)
+
+def stats_response(handle, version, build_body=None):
+    # Without build_body, returns None when the body isn't already cached
+    etag = hashlib.sha1(repr((handle, version)).encode("utf-8")).hexdigest()
+    if request.if_none_match.contains_weak(etag):
+        incr("stats.not_modified")
+        response = app.response_class(status=304)
+    else:
+        # Cached as the encoded body, so hot handles skip serialisation too
+        if build_body is None:
+            body = derived_cache.peek(("response", handle), version)
+            if body is None:
+                return None
+        else:
+            body = derived_cache.get(("response", handle), version, build_body)
+        response = app.response_class(body, mimetype="application/json")
+    inputs = [(method, fetched_at) for method, fetched_at in zip(STATS_INPUTS, version) if fetched_at is not None]
+    set_freshness_headers(response, etag, inputs)
+    return response
+
+@app.route('/api/stats')
+def get_stats():
+    handle = request.args.get('handle')
+    if not handle:
+        return jsonify({"error": "No handle provided"}), 400
+
+    logging.info(f"Request for stats of handle: {handle}")
+
+    version = fresh_stats_version(handle)
+    if version is not None:
+        response = stats_response(handle, version)
+        if response is not None:
+            incr("stats.metadata_hits")
+            return response
+
+    # Issue all upstream calls at once; errors are still checked in the original order
+    info_future = submit_fetch(fetch_user_info_entry, handle)
+    submissions_future = submit_fetch(fetch_user_submissions_entry, handle)
+    rating_future = submit_fetch(fetch_user_rating_entry, handle)
+    rank_index_future = submit_fetch(fetch_rank_index)
+
+    info_entry, err = info_future.result()
+    if err or not info_entry.value:
+        return jsonify({"error": f"User info error: {err or 'No user found'}"}), 400
+
+    submissions_entry, err = submissions_future.result()
+    if err:
+        return jsonify({"error": f"Submissions error: {err}"}), 400
+
+    rating_entry, err = rating_future.result()
+    if err:
+        return jsonify({"error": f"User rating error: {err}"}), 400
+
+    rank_index, err = rank_index_future.result()
+    if err:
+        rank_index = EMPTY_RANK_INDEX
+
+    contest_index = current_contest_index()
+
+    # The response only changes when one of its inputs is refetched
+    version = (
+        info_entry.fetched_at, submissions_entry.fetched_at, rating_entry.fetched_at,
+        rank_index.version, contest_index.version,
+    )
+    return stats_response(handle, version, lambda: dumps_json(build_stats_response(
+        handle, info_entry.value[0], submissions_entry.value, rating_entry.value, rank_index, contest_index,
+    )))
+
+@app.route('/api/percentile')
+def get_percentile():
+    handle = request.args.get('handle')
+    rating = request.args.get('rating')
+    country = request.args.get('country')
+    if not handle and rating is None:
+        return jsonify({"error": "Provide a handle or a rating"}), 400
+
+    rank_index_future = submit_fetch(fetch_rank_index)
+    if handle:
+        user_info_list, err = fetch_user_info(handle)
+        if err or not user_info_list:
+            return jsonify({"error": f"User info error: {err or 'No user found'}"}), 400
+        user_info = user_info_list[0]
+        if rating is None:
+            rating = user_info.get("rating")
+            if rating is None:
+                return jsonify({"error": f"User {handle} is unrated"}), 400
+        if country is None:
+            country = user_info.get("country")
+    rating = safe_get_int(rating, default=None)
+    if rating is None:
+        return jsonify({"error": "Rating must be an integer"}), 400
+
+    rank_index, err = rank_index_future.result()
+    if err:
+        return jsonify({"error": f"Rated list error: {err}"}), 400
+
+    return jsonify({
+        "handle": handle,
+        "rating": rating,
+        "global_percentile": rank_index.rating_percentile(rating),
+        "rated_users": len(rank_index.ratings),
+        "country": country,
+        "country_percentile": rank_index.rating_percentile(rating, country, by_country=True) if country else None,
+        "country_users": len(rank_index.country_ratings.get(country, [])) if country else None,
+    })
+
+@app.route('/api/metrics')
+def get_metrics():
+    with metrics_lock:
+        counters = dict(metrics)
+    return jsonify({
+        "counters": counters,
+        "inflight_fetches": inflight_count(),
+        "cache": cache.stats(),
+        "derived_cache": derived_cache.stats(),
+        "stats_states": stats_states.stats(),
+        "disk_cache": disk_cache.stats() if disk_cache is not None else None,
+        "http_pool": http_pool_stats(),
+        "fixture_mode": FIXTURE_MODE or None,
+        "rate_limiter": rate_limiter.stats(),
+        "circuit_breakers": {method: breaker.stats() for method, breaker in sorted(breakers.items())},
+        "ttl_policy": {method: {"ttl": ttl, "stale_ttl": stale_ttl} for method, (ttl, stale_ttl) in TTL_POLICY.items()},
+    })
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
@@ -0,0 +1,200 @@
+# Offline benchmarks for the Codeforces fetch layer, run against synthetic
+# fixtures shaped like real user.status / user.ratedList responses.
+#
+#   python bench.py [--submissions 100000] [--rated-users 40000]
+#   python bench.py --replay fixtures/ --handle tourist [--rounds 20]
+#
+# --replay times /api/stats against responses captured with
+# CF_FIXTURE_MODE=record, without touching the network.
+#
+# Fixtures are decoded three ways: buffered (r.json()), streamed into plain
+# dicts holding the record fields, and streamed into the app's slotted records.
+# Each case runs in a fresh interpreter so peak RSS is measured in isolation.
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+LANGUAGES = ["GNU C++17", "GNU C++20 (64)", "Python 3", "PyPy 3-64", "Java 21", "Rust 2021"]
+VERDICTS = ["OK", "OK", "OK", "WRONG_ANSWER", "TIME_LIMIT_EXCEEDED", "RUNTIME_ERROR", "COMPILATION_ERROR"]
+TAGS = ["dp", "greedy", "math", "graphs", "strings", "implementation", "brute force", "constructive algorithms"]
+COUNTRIES = ["Russia", "China", "India", "United States", "Belarus", "Japan", "Poland", None]
+
+def make_submissions(n, seed=1):
+    rng = random.Random(seed)
+    subs = []
+    for i in range(n, 0, -1):
+        contest_id = 1 + rng.randrange(2000)
+        index = rng.choice("ABCDEFG")
+        subs.append({
+            "id": 100000000 + i,
+            "contestId": contest_id,
+            "creationTimeSeconds": 1500000000 + i * 60,
+            "relativeTimeSeconds": 2147483647,
+            "problem": {
+                "contestId": contest_id,
+                "index": index,
+                "name": f"Problem {contest_id}{index}",
+                "type": "PROGRAMMING",
+                "points": 1000.0,
+                "rating": 800 + 100 * rng.randrange(28),
+                "tags": rng.sample(TAGS, rng.randrange(1, 4)),
+            },
+            "author": {
+                "contestId": contest_id,
+                "members": [{"handle": "benchmark_user"}],
+                "participantType": "PRACTICE",
+                "ghost": False,
+                "startTimeSeconds": 1500000000,
+            },
+            "programmingLanguage": rng.choice(LANGUAGES),
+            "verdict": rng.choice(VERDICTS),
+            "testset": "TESTS",
+            "passedTestCount": rng.randrange(100),
+            "timeConsumedMillis": rng.randrange(2000),
+            "memoryConsumedBytes": rng.randrange(256) * 1024 * 1024,
+        })
+    return subs
+
+def make_rated_users(n, seed=2):
+    rng = random.Random(seed)
+    users = []
+    for i in range(n):
+        user = {
+            "handle": f"user_{i}",
+            "firstName": "First",
+            "lastName": "Last",
+            "rating": 4000 - i * 3600 // n,
+            "maxRating": 4000 - i * 3000 // n,
+            "rank": "expert",
+            "maxRank": "candidate master",
+            "contribution": rng.randrange(-50, 200),
+            "friendOfCount": rng.randrange(1000),
+            "lastOnlineTimeSeconds": 1700000000 + i,
+            "registrationTimeSeconds": 1300000000 + i,
+            "avatar": "https://userpic.codeforces.org/no-avatar.jpg",
+            "titlePhoto": "https://userpic.codeforces.org/no-title.jpg",
+            "organization": "Some University",
+        }
+        country = rng.choice(COUNTRIES)
+        if country:
+            user["country"] = country
+            user["city"] = "Some City"
+        users.append(user)
+    return users
+
+def write_fixture(directory, name, result):
+    path = os.path.join(directory, f"{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"status": "OK", "result": result}, f)
+    return path
+
+def read_chunks(path, size):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(size)
+            if not chunk:
+                return
+            yield chunk
+
+def peak_rss_kb():
+    # ru_maxrss survives exec on Linux (it would include the fixture generator),
+    # so prefer the per-process high-water mark when /proc is available
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def measure(mode, path, method):
+    import app
+
+    before = peak_rss_kb()
+    start = time.perf_counter()
+    if mode == "buffered":
+        # What r.json() does: whole body as bytes, then text, then the full tree
+        with open(path, "rb") as f:
+            body = f.read()
+        result = json.loads(body.decode("utf-8"))["result"]
+        del body
+    else:
+        project = app.STREAMED_RESULTS[method]
+        if mode == "dicts":
+            to_record = project
+
+            def project(item):
+                record = to_record(item)
+                return dict(zip(record.__slots__, record.as_list()))
+        result, err = app.stream_api_result(read_chunks(path, app.STREAM_CHUNK_SIZE), project)
+        assert err is None
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_kb()
+    print(json.dumps({"records": len(result), "seconds": elapsed, "peak_rss_kb": peak - before}))
+
+def bench_stats(fixture_dir, handles, rounds):
+    os.environ["CF_FIXTURE_MODE"] = "replay"
+    os.environ["CF_FIXTURE_DIR"] = fixture_dir
+    import app
+
+    client = app.app.test_client()
+    print(f"{'handle':<20}{'cold ms':>10}{'warm p50 ms':>13}{'warm max ms':>13}")
+    for handle in handles:
+        start = time.perf_counter()
+        r = client.get(f"/api/stats?handle={handle}")
+        cold = (time.perf_counter() - start) * 1000
+        if r.status_code != 200:
+            print(f"{handle:<20} failed: {r.get_json().get('error')}")
+            continue
+        warm = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            client.get(f"/api/stats?handle={handle}")
+            warm.append((time.perf_counter() - start) * 1000)
+        warm.sort()
+        print(f"{handle:<20}{cold:>10.1f}{warm[len(warm) // 2]:>13.1f}{warm[-1]:>13.1f}")
+
+def run_case(mode, path, method):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--measure", mode, path, method],
+        check=True, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Codeforces fetch layer on synthetic fixtures")
+    parser.add_argument("--submissions", type=int, default=100000)
+    parser.add_argument("--rated-users", type=int, default=40000)
+    parser.add_argument("--replay", metavar="FIXTURE_DIR", help="time /api/stats against recorded fixtures")
+    parser.add_argument("--handle", action="append", default=[], help="handle to request in --replay mode")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--measure", nargs=3, metavar=("MODE", "PATH", "METHOD"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(*args.measure)
+        return
+    if args.replay:
+        bench_stats(args.replay, args.handle or ["tourist"], args.rounds)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        fixtures = [
+            ("user.status", write_fixture(directory, "user_status", make_submissions(args.submissions))),
+            ("user.ratedList", write_fixture(directory, "rated_list", make_rated_users(args.rated_users))),
+        ]
+        print(f"{'fixture':<16}{'size MB':>9}{'mode':>10}{'records':>9}{'seconds':>9}{'peak RSS MB':>13}")
+        for method, path in fixtures:
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            for mode in ("buffered", "dicts", "records"):
+                r = run_case(mode, path, method)
+                print(f"{method:<16}{size_mb:>9.1f}{mode:>10}{r['records']:>9}{r['seconds']:>9.2f}{r['peak_rss_kb'] / 1024:>13.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+# Stand-in for the Codeforces API, for load-testing the dashboard end to end
+# without the network. Data is synthetic but deterministic for a given --seed.
+#
+#   python mock_cf_server.py --port 8001 --latency lognormal:0.15,0.6 --error-rate 0.01 --call-limit 5
+#   CF_API_BASE=http://127.0.0.1:8001/api python app.py
+#
+# Every handle exists except those starting with "nobody". Handles starting
+# with "heavy" get 100000 submissions. With --submission-interval, each handle
+# gains a new submission every N seconds, judged for a few seconds first, so
+# the app's incremental sync has something to pick up.
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from functools import lru_cache
+
+from flask import Flask, Response, request
+
+app = Flask(__name__)
+
+TAGS = [
+    "implementation", "math", "greedy", "dp", "data structures", "brute force",
+    "constructive algorithms", "graphs", "sortings", "binary search", "dfs and similar",
+    "trees", "strings", "number theory", "combinatorics", "two pointers", "bitmasks",
+    "geometry", "dsu", "shortest paths", "probabilities", "games", "interactive",
+]
+LANGUAGES = ["GNU C++17", "GNU C++20 (64)", "C++23 (GCC 14-64, msys2)", "Python 3", "PyPy 3-64", "Java 21", "Rust 2021", "Kotlin 1.9"]
+VERDICTS = [
+    ("OK", 50), ("WRONG_ANSWER", 25), ("TIME_LIMIT_EXCEEDED", 8), ("RUNTIME_ERROR", 5),
+    ("MEMORY_LIMIT_EXCEEDED", 2), ("COMPILATION_ERROR", 4), ("SKIPPED", 1), ("CHALLENGED", 1),
+]
+COUNTRIES = ["Russia", "China", "India", "United States", "Belarus", "Japan", "Poland", "Ukraine", "Bangladesh", "Brazil", "Korea, Republic of", "Vietnam"]
+RANKS = [
+    (3000, "legendary grandmaster"), (2600, "international grandmaster"), (2400, "grandmaster"),
+    (2300, "international master"), (2100, "master"), (1900, "candidate master"),
+    (1600, "expert"), (1400, "specialist"), (1200, "pupil"), (-10000, "newbie"),
+]
+START_TIME = 1262304000  # 2010-01-01, first synthetic contest
+
+config = argparse.Namespace(
+    seed=1, users=40000, contests=2000, latency="0", error_rate=0.0,
+    call_limit=0.0, call_burst=5.0, submission_interval=0.0,
+)
+started_at = time.time()
+
+def rank_for(rating):
+    for floor, name in RANKS:
+        if rating >= floor:
+            return name
+    return "newbie"
+
+def handle_rng(handle, salt=""):
+    return random.Random(zlib.crc32(f"{config.seed}:{salt}:{handle.lower()}".encode("utf-8")))
+
+# Synthetic datasets
+
+def contest_name(contest_id, rng):
+    kind = rng.random()
+    if kind < 0.25:
+        return f"Codeforces Round {contest_id} (Div. 2)"
+    if kind < 0.35:
+        return f"Codeforces Round {contest_id} (Div. 1)"
+    if kind < 0.45:
+        return f"Codeforces Round {contest_id} (Div. 3)"
+    if kind < 0.52:
+        return f"Codeforces Round {contest_id} (Div. 4)"
+    if kind < 0.65:
+        return f"Codeforces Round {contest_id} (Div. 1 + Div. 2)"
+    if kind < 0.85:
+        return f"Educational Codeforces Round {contest_id // 10} (Rated for Div. 2)"
+    if kind < 0.92:
+        return f"Codeforces Global Round {contest_id // 40}"
+    return f"Kotlin Heroes: Episode {contest_id // 100}"
+
+@lru_cache(maxsize=1)
+def contests():
+    rng = random.Random(config.seed)
+    result = []
+    for contest_id in range(1, config.contests + 1):
+        start = START_TIME + contest_id * 2 * 86400
+        duration = rng.choice([7200, 7200, 8100, 9000, 10800])
+        result.append({
+            "id": contest_id,
+            "name": contest_name(contest_id, rng),
+            "type": "ICPC" if rng.random() < 0.3 else "CF",
+            "phase": "FINISHED",
+            "frozen": False,
+            "durationSeconds": duration,
+            "startTimeSeconds": start,
+            "relativeTimeSeconds": int(time.time()) - start,
+        })
+    result.reverse()  # newest first, like Codeforces
+    return result
+
+@lru_cache(maxsize=1)
+def problems():
+    rng = random.Random(config.seed + 1)
+    result = []
+    for contest in contests():
+        for index in "ABCDEF"[:rng.randrange(4, 7)]:
+            result.append({
+                "contestId": contest["id"],
+                "index": index,
+                "name": f"Problem {contest['id']}{index}",
+                "type": "PROGRAMMING",
+                "rating": min(3500, 800 + 100 * ("ABCDEF".index(index) * 3 + rng.randrange(6))),
+                "tags": rng.sample(TAGS, rng.randrange(1, 5)),
+            })
+    return result
+
+@lru_cache(maxsize=1)
+def rated_users():
+    rng = random.Random(config.seed + 2)
+    result = []
+    for i in range(config.users):
+        # Heavy-tailed rating distribution, highest first
+        rating = int(4000 * math.exp(-3.2 * (i + 1) / config.users) + 300 * rng.random())
+        result.append(user_record(f"user_{i}", rating, rng))
+    result.sort(key=lambda u: -u["rating"])
+    return result
+
+@lru_cache(maxsize=1)
+def rated_index():
+    return {u["handle"].lower(): u for u in rated_users()}
+
+def user_record(handle, rating, rng):
+    max_rating = rating + rng.randrange(0, 300)
+    record = {
+        "handle": handle,
+        "rating": rating,
+        "maxRating": max_rating,
+        "rank": rank_for(rating),
+        "maxRank": rank_for(max_rating),
+        "contribution": rng.randrange(-20, 150),
+        "friendOfCount": rng.randrange(0, 5000),
+        "lastOnlineTimeSeconds": int(time.time()) - rng.randrange(0, 90 * 86400),
+        "registrationTimeSeconds": START_TIME + rng.randrange(0, 12 * 365 * 86400),
+        "avatar": "https://userpic.codeforces.org/no-avatar.jpg",
+        "titlePhoto": "https://userpic.codeforces.org/no-title.jpg",
+    }
+    if rng.random() < 0.85:
+        record["country"] = rng.choice(COUNTRIES)
+        record["city"] = "Synthetic City"
+    if rng.random() < 0.5:
+        record["organization"] = "Synthetic University"
+    return record
+
+def user_info(handle):
+    if handle.lower().startswith("nobody"):
+        return None
+    user = rated_index().get(handle.lower())
+    if user is not None:
+        return user
+    rng = handle_rng(handle, "info")
+    return user_record(handle, rng.randrange(800, 2200), rng)
+
+@lru_cache(maxsize=256)
+def base_submissions(handle):
+    rng = handle_rng(handle, "status")
+    count = 100000 if handle.lower().startswith("heavy") else rng.randrange(50, 3000)
+    pool = problems()
+    verdicts, weights = zip(*VERDICTS)
+    subs = []
+    created = int(started_at) - count * 3600
+    for i in range(count):
+        problem = rng.choice(pool)
+        created += rng.randrange(60, 7200)
+        subs.append(submission(handle, 10 ** 6 + i, problem, rng.choices(verdicts, weights)[0], created, rng))
+    subs.reverse()
+    return subs
+
+def submission(handle, submission_id, problem, verdict, created, rng):
+    sub = {
+        "id": submission_id,
+        "contestId": problem["contestId"],
+        "creationTimeSeconds": created,
+        "relativeTimeSeconds": 2147483647,
+        "problem": problem,
+        "author": {
+            "contestId": problem["contestId"],
+            "members": [{"handle": handle}],
+            "participantType": "PRACTICE",
+            "ghost": False,
+            "startTimeSeconds": created,
+        },
+        "programmingLanguage": rng.choice(LANGUAGES),
+        "testset": "TESTS",
+        "passedTestCount": rng.randrange(0, 60),
+        "timeConsumedMillis": rng.randrange(15, 2000),
+        "memoryConsumedBytes": rng.randrange(0, 256) * 1024 * 1024,
+    }
+    if verdict is not None:
+        sub["verdict"] = verdict
+    return sub
+
+def live_submissions(handle):
+    # Submissions made since the server started, newest first
+    if config.submission_interval <= 0:
+        return []
+    elapsed = time.time() - started_at
+    count = int(elapsed // config.submission_interval)
+    base = base_submissions(handle)
+    next_id = (base[0]["id"] if base else 10 ** 6) + 1
+    pool = problems()
+    subs = []
+    for i in range(count):
+        rng = handle_rng(handle, f"live{i}")
+        created = int(started_at + (i + 1) * config.submission_interval)
+        verdict = "TESTING" if time.time() - created < 5 else rng.choice(["OK", "WRONG_ANSWER"])
+        subs.append(submission(handle, next_id + i, rng.choice(pool), verdict, created, rng))
+    subs.reverse()
+    return subs
+
+def rating_history(handle):
+    user = user_info(handle)
+    rng = handle_rng(handle, "rating")
+    history = []
+    rating = 1500
+    for contest in reversed(contests()):
+        if rng.random() > 0.08:
+            continue
+        target = user.get("rating", 1500)
+        new_rating = max(0, rating + int((target - rating) * 0.2) + rng.randrange(-60, 61))
+        history.append({
+            "contestId": contest["id"],
+            "contestName": contest["name"],
+            "handle": user["handle"],
+            "rank": rng.randrange(1, 20000),
+            "ratingUpdateTimeSeconds": contest["startTimeSeconds"] + contest["durationSeconds"] + 7200,
+            "oldRating": rating,
+            "newRating": new_rating,
+        })
+        rating = new_rating
+    return history
+
+# Failure injection
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+buckets = {}
+buckets_lock = threading.Lock()
+
+def sample_latency(spec):
+    # "0.05" fixed, "uniform:LOW,HIGH", "lognormal:MEDIAN,SIGMA", "exp:MEAN"
+    kind, _, params = spec.partition(":")
+    if not params:
+        return float(kind)
+    values = [float(v) for v in params.split(",")]
+    if kind == "uniform":
+        return random.uniform(values[0], values[1])
+    if kind == "lognormal":
+        return random.lognormvariate(math.log(values[0]), values[1])
+    if kind == "exp":
+        return random.expovariate(1 / values[0])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+def envelope(result, status=200):
+    return Response(json.dumps({"status": "OK", "result": result}), status=status, mimetype="application/json")
+
+def failed(comment, status=400):
+    return Response(json.dumps({"status": "FAILED", "comment": comment}), status=status, mimetype="application/json")
+
+@app.before_request
+def inject_faults():
+    delay = sample_latency(config.latency)
+    if delay > 0:
+        time.sleep(delay)
+    if config.call_limit > 0:
+        with buckets_lock:
+            bucket = buckets.setdefault(request.remote_addr, TokenBucket(config.call_limit, config.call_burst))
+            allowed = bucket.take()
+        if not allowed:
+            return failed("Call limit exceeded", status=503)
+    if config.error_rate > 0 and random.random() < config.error_rate:
+        return failed("Internal Server Error", status=random.choice([500, 502, 504]))
+
+# Endpoints
+
+def int_arg(name, default):
+    try:
+        return int(request.args.get(name, default))
+    except ValueError:
+        return None
+
+@app.route("/api/user.info")
+def api_user_info():
+    handles = [h for h in request.args.get("handles", "").split(";") if h]
+    if not handles:
+        return failed("handles: Field should not be empty")
+    result = []
+    for handle in handles:
+        user = user_info(handle)
+        if user is None:
+            return failed(f"handles: User with handle {handle} not found")
+        result.append(user)
+    return envelope(result)
+
+@app.route("/api/user.status")
+def api_user_status():
+    handle = request.args.get("handle", "")
+    if not handle:
+        return failed("handle: Field should not be empty")
+    if user_info(handle) is None:
+        return failed(f"handle: User with handle {handle} not found")
+    start, count = int_arg("from", 1), int_arg("count", 10 ** 9)
+    if start is None or start < 1:
+        return failed("from: Field should contain positive integer")
+    if count is None or count < 1:
+        return failed("count: Field should contain positive integer")
+    live = live_submissions(handle)
+    base = base_submissions(handle)
+    # Slice the concatenation without materialising it
+    lo, hi = start - 1, start - 1 + count
+    result = live[lo:hi] + base[max(0, lo - len(live)):max(0, hi - len(live))]
+    return envelope(result)
+
+@app.route("/api/user.rating")
+def api_user_rating():
+    handle = request.args.get("handle", "")
+    if not handle:
+        return failed("handle: Field should not be empty")
+    if user_info(handle) is None:
+        return failed(f"handle: User with handle {handle} not found")
+    return envelope(rating_history(handle))
+
+@app.route("/api/user.ratedList")
+def api_user_rated_list():
+    return envelope(rated_users())
+
+@app.route("/api/contest.list")
+def api_contest_list():
+    return envelope(contests())
+
+@app.route("/api/problemset.problems")
+def api_problemset_problems():
+    pool = problems()
+    stats = [{"contestId": p["contestId"], "index": p["index"], "solvedCount": 50000 // (2 + "ABCDEF".index(p["index"]))} for p in pool]
+    return envelope({"problems": pool, "problemStatistics": stats})
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Codeforces API server for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--seed", type=int, default=config.seed)
+    parser.add_argument("--users", type=int, default=config.users, help="size of user.ratedList")
+    parser.add_argument("--contests", type=int, default=config.contests)
+    parser.add_argument("--latency", default=config.latency,
+                        help='per-call latency: "0.05", "uniform:LOW,HIGH", "lognormal:MEDIAN,SIGMA" or "exp:MEAN" (seconds)')
+    parser.add_argument("--error-rate", type=float, default=config.error_rate, help="fraction of calls failing with 5xx")
+    parser.add_argument("--call-limit", type=float, default=config.call_limit,
+                        help='calls per second per client before "Call limit exceeded" (0 disables)')
+    parser.add_argument("--call-burst", type=float, default=config.call_burst)
+    parser.add_argument("--submission-interval", type=float, default=config.submission_interval,
+                        help="seconds between new submissions for every handle (0 disables)")
+    args = parser.parse_args()
+    vars(config).update({k: v for k, v in vars(args).items() if k in vars(config)})
+    sample_latency(config.latency)  # validate early
+    app.run(host=args.host, port=args.port, threaded=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+from collections import Counter, defaultdict
+import random
+
+import pytest
+
+import app
+
+VERDICTS = ["OK", "WRONG_ANSWER", "TIME_LIMIT_EXCEEDED", "TESTING", "CHALLENGED", None]
+TAGS = ["dp", "math", "greedy", "graphs"]
+
+# The original per-submission loops of calculate_stats, over API-shaped dicts
+# in API order (newest first). language_counter is checked separately.
+def reference_stats(submissions):
+    verdict_counter = Counter()
+    attempted_problems = set()
+    solved_problems = set()
+    first_attempt_solved = set()
+    problem_first_submission = {}
+    contests_participated = set()
+    difficulty_solved = Counter()
+    topic_solved = Counter()
+    accepted_count = 0
+    wrong_answer_count = 0
+
+    for sub in submissions:
+        problem = sub['problem']
+        problem_id = (problem.get('contestId'), problem.get('index'))
+        attempted_problems.add(problem_id)
+        contests_participated.add(problem.get('contestId'))
+
+        verdict = sub.get('verdict', 'UNKNOWN')
+        verdict_counter[verdict] += 1
+
+        if verdict == "OK":
+            accepted_count += 1
+            solved_problems.add(problem_id)
+            if problem_id not in problem_first_submission:
+                problem_first_submission[problem_id] = verdict
+                first_attempt_solved.add(problem_id)
+            if problem.get('rating'):
+                difficulty_solved[problem['rating']] += 1
+            for tag in problem.get('tags', []):
+                topic_solved[tag] += 1
+        else:
+            if verdict == "WRONG_ANSWER":
+                wrong_answer_count += 1
+            if problem_id not in problem_first_submission:
+                problem_first_submission[problem_id] = verdict
+
+    unique_attempted = len(attempted_problems)
+    unique_solved = len(solved_problems)
+
+    problem_attempts = defaultdict(int)
+    for sub in submissions:
+        problem_attempts[(sub['problem'].get('contestId'), sub['problem'].get('index'))] += 1
+    max_attempts = max(problem_attempts.values()) if problem_attempts else 0
+
+    return {
+        "total_submissions": len(submissions),
+        "accepted_count": accepted_count,
+        "wrong_answer_count": wrong_answer_count,
+        "unique_attempted": unique_attempted,
+        "unique_solved": unique_solved,
+        "problem_solving_rate": round((unique_solved / unique_attempted) * 100, 2) if unique_attempted else 0.0,
+        "contests_participated": len(contests_participated),
+        "first_attempt_solved": len(first_attempt_solved),
+        "verdict_counter": dict(verdict_counter),
+        "most_attempted_problems": [f"{c}-{i}" for (c, i), n in problem_attempts.items() if n == max_attempts],
+        "max_attempts": max_attempts,
+        "difficulty_solved": dict(difficulty_solved),
+        "topic_solved": dict(topic_solved),
+    }
+
+def random_submissions(rng, n):
+    subs = []
+    for i in range(n):
+        problem = {"contestId": rng.choice([1, 2, 3, None]), "index": rng.choice("ABC")}
+        if rng.random() < 0.7:
+            problem["rating"] = rng.choice([0, 800, 1200, 3500])
+        if rng.random() < 0.8:
+            problem["tags"] = rng.sample(TAGS, rng.randrange(0, 4))
+        sub = {"id": n - i, "problem": problem}
+        if rng.random() < 0.2:
+            sub["programmingLanguage"] = rng.choice(["GNU C++17", "Python 3"])
+        verdict = rng.choice(VERDICTS)
+        if verdict is not None:
+            sub["verdict"] = verdict
+        subs.append(sub)
+    return subs
+
+def records(submissions):
+    return [app.Submission.from_api(sub) for sub in submissions]
+
+def without_languages(stats):
+    stats = dict(stats)
+    del stats["language_counter"]
+    return stats
+
+@pytest.mark.parametrize("n", [0, 1, 2, 5, 50, 500])
+def test_calculate_stats_matches_reference(n):
+    rng = random.Random(n)
+    for _ in range(20):
+        subs = random_submissions(rng, n)
+        stats = app.calculate_stats(records(subs))
+        assert without_languages(stats) == reference_stats(subs)
+        assert stats["language_counter"] == dict(Counter(sub.get("programmingLanguage", "Unknown") for sub in subs))
+
+def test_most_attempted_problems_newest_first():
+    subs = [
+        {"id": 4, "problem": {"contestId": 2, "index": "A"}, "verdict": "OK"},
+        {"id": 3, "problem": {"contestId": 1, "index": "A"}, "verdict": "WRONG_ANSWER"},
+        {"id": 2, "problem": {"contestId": 2, "index": "A"}, "verdict": "WRONG_ANSWER"},
+        {"id": 1, "problem": {"contestId": 1, "index": "A"}, "verdict": "WRONG_ANSWER"},
+    ]
+    assert app.calculate_stats(records(subs))["most_attempted_problems"] == ["2-A", "1-A"]
+
+def test_many_tied_problems():
+    subs = [{"id": 3000 - i, "problem": {"contestId": i, "index": "A"}, "verdict": "OK"} for i in range(3000)]
+    stats = app.calculate_stats(records(subs))
+    assert stats["max_attempts"] == 1
+    assert stats["most_attempted_problems"] == [f"{i}-A" for i in range(3000)]
+
+def test_stats_state_sync_matches_full_recompute():
+    rng = random.Random(20)
+    for _ in range(20):
+        state = app.StatsState()
+        subs = []
+        next_id = 1
+        for _ in range(30):
+            step = rng.random()
+            if step < 0.5 or not subs:
+                # new submissions arrive at the front
+                added = random_submissions(rng, rng.randrange(1, 8))
+                for sub in reversed(added):
+                    sub["id"] = next_id
+                    next_id += 1
+                subs = added + subs
+            elif step < 0.8:
+                # judging finishes, or a hack flips an old verdict
+                sub = rng.choice(subs)
+                sub["verdict"] = rng.choice(["OK", "WRONG_ANSWER", "CHALLENGED", "SKIPPED"])
+            else:
+                del subs[rng.randrange(len(subs))]
+            state.sync(records(subs))
+            assert without_languages(state.stats()) == reference_stats(subs)
+            assert state.stats() == app.calculate_stats(records(subs))
+
+@pytest.mark.parametrize("before, after", [
+    ([(2, "OK"), (1, "WRONG_ANSWER")], [(2, "WRONG_ANSWER"), (1, "WRONG_ANSWER")]),
+    ([(2, "TESTING"), (1, "OK")], [(3, "OK"), (2, "OK"), (1, "OK")]),
+    ([(3, "OK"), (2, "OK"), (1, "OK")], [(3, "OK"), (1, "OK")]),
+    ([(3, "OK"), (2, "OK"), (1, "OK")], [(2, "OK"), (1, "OK")]),
+    ([(2, "OK"), (1, "OK")], [(4, "OK"), (2, "OK"), (1, "CHALLENGED")]),
+])
+def test_stats_state_sync_after_changes(before, after):
+    def submissions(rows):
+        return [{"id": id, "problem": {"contestId": 1, "index": "A"}, "verdict": verdict} for id, verdict in rows]
+    state = app.StatsState()
+    state.sync(records(submissions(before)))
+    state.sync(records(submissions(after)))
+    assert state.stats() == app.calculate_stats(records(submissions(after)))
+    assert without_languages(state.stats()) == reference_stats(submissions(after))
+
+def test_stats_state_cache_evicts_by_size():
+    cache = app.StatsStateCache(max_bytes=250, row_bytes=10)
+    subs = records([{"id": id, "problem": {"contestId": 1, "index": "A"}, "verdict": "OK"} for id in range(10, 0, -1)])
+    for key in ("a", "b", "c"):
+        state = cache.get(key)
+        state.sync(subs)
+        cache.resize(key, state)
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == 200
+    assert stats["evictions"] == 1
+    assert cache.get("b") is not None and cache.stats()["hits"] == 1
+    cache.get("a")
+    assert cache.stats()["misses"] == 4